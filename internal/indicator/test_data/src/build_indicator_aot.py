@@ -0,0 +1,47 @@
+"""
+Ahead-of-time compile the numba indicator kernels into the `indicator_calculator.indicator_kernels`
+extension module, so the first indicator call doesn't pay the JIT compilation cost.
+
+Requires numba and a C compiler:
+
+    poetry run python build_indicator_aot.py
+
+Without the compiled module the kernels are JIT-compiled from `indicator_calculator/_jit.py`.
+The module records a hash of `_jit.py`; if `_jit.py` changes afterwards the compiled module is
+ignored until this script is re-run.
+"""
+import os
+
+from numba.pycc import CC
+
+from indicator_calculator import _jit
+from indicator_calculator._njit import kernel_source_hash
+
+PACKAGE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "indicator_calculator")
+
+
+def main():
+    cc = CC("indicator_kernels")
+    cc.output_dir = PACKAGE_DIR
+
+    # Export the undecorated Python functions, so the compiled kernels are the same code as the JIT ones.
+    # The signatures must match how indicator.py calls them: contiguous float64/int64 arrays.
+    cc.export("_fused_indicators", "void(f8[::1], i8[::1], f8[:, ::1], f8[:, ::1], f8[:, ::1])")(
+        _jit._fused_indicators.py_func)
+    cc.export("_multi_sma", "void(f8[::1], i8[::1], f8[:, ::1])")(_jit._multi_sma.py_func)
+    cc.export("_macd_loop", "UniTuple(f8[::1], 5)(f8[::1], i8, i8, i8)")(_jit._macd_loop.py_func)
+
+    # Record which _jit.py the kernels were compiled from; indicator.py ignores the module on a mismatch
+    source_hash = kernel_source_hash()
+
+    def _kernel_source_hash():
+        return source_hash
+
+    cc.export("_kernel_source_hash", "i8()")(_kernel_source_hash)
+
+    cc.compile()
+    print(f"Compiled indicator kernels into {PACKAGE_DIR}")
+
+
+if __name__ == "__main__":
+    main()
@@ -20,10 +20,10 @@ def rsi(close: pd.Series | np.ndarray, period: int = 14) -> np.ndarray:
     is available are filled with NaN.
     """
 
-    series = pd.Series(np.asarray(close, dtype=float))
-    delta = series.diff()
-    gain = delta.where(delta > 0, 0.0)
-    loss = (-delta).where(delta < 0, 0.0)
+    delta = np.diff(np.asarray(close, dtype=float), prepend=np.nan)
+    # Branchless split; fmax maps the leading NaN change to 0 like `Series.where` did.
+    gain = pd.Series(np.fmax(delta, 0.0))
+    loss = pd.Series(np.fmax(-delta, 0.0))
 
     avg_gain = gain.rolling(window=period, min_periods=period).mean()
     avg_loss = loss.rolling(window=period, min_periods=period).mean()
@@ -1,2 +1,2 @@
-from .duckdb import read_parquet_to_df, write_df_to_parquet
-from .indicator import calculate_rsi, calculate_ema, calculate_macd, calculate_sma
\ No newline at end of file
+from .duckdb import read_parquet_to_df, read_parquet_columns, write_df_to_parquet
+from .indicator import calculate_rsi, calculate_ema, calculate_macd, calculate_sma, calculate_rsi_ema_sma, calculate_all
\ No newline at end of file
@@ -0,0 +1,233 @@
+import numpy as np
+
+from ._njit import njit
+
+
+@njit(cache=True)
+def _macd_loop(close: np.ndarray, fast_period: int, slow_period: int, signal_period: int):
+    """
+    Calculate the MACD EMAs, line, signal and histogram in a single pass over close.
+    Each EMA is seeded with the SMA of the non-NaN values among its first `period` values,
+    and the values before the seed are NaN.
+    Args:
+        close (np.ndarray): The float64 close prices.
+        fast_period (int): The number of periods to use for the fast EMA calculation.
+        slow_period (int): The number of periods to use for the slow EMA calculation.
+        signal_period (int): The number of periods to use for the signal line calculation.
+    Returns:
+        tuple: The fast EMA, slow EMA, MACD line, signal line and histogram arrays.
+    """
+    n = len(close)
+    ema_fast = np.full(n, np.nan)
+    ema_slow = np.full(n, np.nan)
+    macd = np.full(n, np.nan)
+    signal = np.full(n, np.nan)
+    hist = np.full(n, np.nan)
+
+    fast_multiplier = 2.0 / (fast_period + 1)
+    slow_multiplier = 2.0 / (slow_period + 1)
+    signal_multiplier = 2.0 / (signal_period + 1)
+
+    first_valid_macd = max(fast_period, slow_period) - 1
+    first_signal_index = first_valid_macd + signal_period - 1
+
+    fast_sum = 0.0
+    slow_sum = 0.0
+    macd_sum = 0.0
+    fast_count = 0
+    slow_count = 0
+    macd_count = 0
+    for i in range(n):
+        price = close[i]
+
+        # Accumulate the SMA seed, then switch to the EMA recursion
+        if i < fast_period:
+            if not np.isnan(price):
+                fast_sum += price
+                fast_count += 1
+            if i == fast_period - 1 and fast_count > 0:
+                ema_fast[i] = fast_sum / fast_count
+        else:
+            ema_fast[i] = price * fast_multiplier + ema_fast[i - 1] * (1 - fast_multiplier)
+
+        if i < slow_period:
+            if not np.isnan(price):
+                slow_sum += price
+                slow_count += 1
+            if i == slow_period - 1 and slow_count > 0:
+                ema_slow[i] = slow_sum / slow_count
+        else:
+            ema_slow[i] = price * slow_multiplier + ema_slow[i - 1] * (1 - slow_multiplier)
+
+        if i < first_valid_macd:
+            continue
+        macd[i] = ema_fast[i] - ema_slow[i]
+
+        # The signal line is the EMA of the MACD line, seeded the same way
+        if i <= first_signal_index:
+            if not np.isnan(macd[i]):
+                macd_sum += macd[i]
+                macd_count += 1
+            if i < first_signal_index:
+                continue
+            if macd_count > 0:
+                signal[i] = macd_sum / macd_count
+        else:
+            signal[i] = macd[i] * signal_multiplier + signal[i - 1] * (1 - signal_multiplier)
+        hist[i] = macd[i] - signal[i]
+
+    return ema_fast, ema_slow, macd, signal, hist
+
+
+@njit(cache=True)
+def _multi_sma(values: np.ndarray, periods: np.ndarray, out: np.ndarray) -> None:
+    """
+    Calculate the simple moving average of values for several periods in a single pass.
+    Each window sum is updated by adding the entering value and subtracting the leaving one,
+    so the cost does not grow with the period. Like pandas' rolling mean, a window containing
+    NaN gives NaN and the values before the first full window are NaN.
+    Args:
+        values (np.ndarray): The contiguous float64 values to average.
+        periods (np.ndarray): The int64 periods to calculate the moving averages for.
+        out (np.ndarray): The (len(periods), len(values)) float64 output for the averages.
+    """
+    n = len(values)
+    k = len(periods)
+
+    window_sum = np.zeros(k)
+    # Number of NaN and of non-zero values in the window, so flat zero windows average to exactly 0
+    nan_count = np.zeros(k, dtype=np.int64)
+    nonzero_count = np.zeros(k, dtype=np.int64)
+
+    for i in range(n):
+        value = values[i]
+        for j in range(k):
+            period = periods[j]
+
+            if np.isnan(value):
+                nan_count[j] += 1
+            else:
+                window_sum[j] += value
+                nonzero_count[j] += value != 0.0
+
+            # Remove the value leaving the window
+            if i >= period:
+                old = values[i - period]
+                if np.isnan(old):
+                    nan_count[j] -= 1
+                else:
+                    window_sum[j] -= old
+                    nonzero_count[j] -= old != 0.0
+
+            if i < period - 1 or nan_count[j] > 0:
+                out[j, i] = np.nan
+            elif nonzero_count[j] == 0:
+                out[j, i] = 0.0
+            else:
+                out[j, i] = window_sum[j] / period
+
+
+@njit(cache=True)
+def _fused_indicators(close: np.ndarray, periods: np.ndarray, rsi: np.ndarray, ema: np.ndarray,
+                      sma: np.ndarray) -> None:
+    """
+    Calculate the RSI, EMA and SMA for several periods in a single pass over close.
+    The values match calculate_rsi, calculate_ema and calculate_sma: rolling-mean RSI,
+    EMA seeded with the first close and NaN before the first full SMA/RSI window.
+    NaN closes are handled like pandas does: the EMA carries its last value across them,
+    as ewm(adjust=False, ignore_na=False) does, and an SMA window containing NaN gives NaN.
+    Args:
+        close (np.ndarray): The contiguous float64 close prices.
+        periods (np.ndarray): The int64 periods to calculate the indicators for.
+        rsi (np.ndarray): The (len(periods), len(close)) float64 output for the RSI values.
+        ema (np.ndarray): The (len(periods), len(close)) float64 output for the EMA values.
+        sma (np.ndarray): The (len(periods), len(close)) float64 output for the SMA values.
+    """
+    n = len(close)
+    k = len(periods)
+
+    # EMA state for each period: the last value and the weight of that value, which decays
+    # across NaN closes
+    ema_value = np.full(k, np.nan)
+    ema_weight = np.ones(k)
+
+    # Running window state for each period
+    close_sum = np.zeros(k)
+    # Number of NaN and of non-zero closes in the window, so a window containing NaN gives
+    # NaN and an all-zero window averages to exactly 0
+    close_nan_count = np.zeros(k, dtype=np.int64)
+    close_nonzero_count = np.zeros(k, dtype=np.int64)
+    gain_sum = np.zeros(k)
+    loss_sum = np.zeros(k)
+    # Number of non-zero gains and losses in the window, so flat windows average to exactly 0
+    gain_count = np.zeros(k, dtype=np.int64)
+    loss_count = np.zeros(k, dtype=np.int64)
+
+    for i in range(n):
+        price = close[i]
+        is_observation = not np.isnan(price)
+        # The first change is treated as 0, like the NaN diff in calculate_rsi
+        change = price - close[i - 1] if i > 0 else 0.0
+        gain = change if change > 0 else 0.0
+        loss = -change if change < 0 else 0.0
+
+        for j in range(k):
+            period = periods[j]
+            alpha = 2.0 / (period + 1)
+
+            # Same recursion as pandas' ewm(adjust=False): the previous value's weight decays
+            # on every row, NaN or not, and is reset once a new close is averaged in
+            if not np.isnan(ema_value[j]):
+                ema_weight[j] *= 1 - alpha
+                if is_observation:
+                    if ema_value[j] != price:
+                        ema_value[j] = (ema_weight[j] * ema_value[j] + alpha * price) / (ema_weight[j] + alpha)
+                    ema_weight[j] = 1.0
+            elif is_observation:
+                ema_value[j] = price
+            ema[j, i] = ema_value[j]
+
+            if is_observation:
+                close_sum[j] += price
+                close_nonzero_count[j] += price != 0.0
+            else:
+                close_nan_count[j] += 1
+            gain_sum[j] += gain
+            loss_sum[j] += loss
+            gain_count[j] += gain != 0.0
+            loss_count[j] += loss != 0.0
+
+            # Remove the value leaving the window
+            if i >= period:
+                old = i - period
+                old_change = close[old] - close[old - 1] if old > 0 else 0.0
+                old_gain = old_change if old_change > 0 else 0.0
+                old_loss = -old_change if old_change < 0 else 0.0
+                if np.isnan(close[old]):
+                    close_nan_count[j] -= 1
+                else:
+                    close_sum[j] -= close[old]
+                    close_nonzero_count[j] -= close[old] != 0.0
+                gain_sum[j] -= old_gain
+                loss_sum[j] -= old_loss
+                gain_count[j] -= old_gain != 0.0
+                loss_count[j] -= old_loss != 0.0
+
+            if i < period - 1:
+                sma[j, i] = np.nan
+                rsi[j, i] = np.nan
+                continue
+
+            if close_nan_count[j] > 0:
+                sma[j, i] = np.nan
+            elif close_nonzero_count[j] == 0:
+                sma[j, i] = 0.0
+            else:
+                sma[j, i] = close_sum[j] / period
+            avg_gain = gain_sum[j] / period if gain_count[j] > 0 else 0.0
+            avg_loss = loss_sum[j] / period if loss_count[j] > 0 else 0.0
+            if avg_loss == 0.0:
+                # Infinite RS gives 100, no gains and no losses is undefined
+                rsi[j, i] = 100.0 if avg_gain > 0.0 else np.nan
+            else:
+                rsi[j, i] = 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
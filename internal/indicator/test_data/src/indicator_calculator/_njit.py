@@ -0,0 +1,33 @@
+"""
+Optional numba support for the indicator kernels.
+
+`njit` is numba's decorator when numba is installed. Otherwise it is a no-op so the
+kernels still run as plain Python loops over NumPy arrays.
+
+`kernel_source_hash` fingerprints `_jit.py`, so kernels compiled ahead of time can be
+checked against the source they were built from.
+"""
+import hashlib
+import os
+
+KERNEL_SOURCE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "_jit.py")
+
+try:
+    from numba import njit
+except ImportError:
+    def njit(*args, **kwargs):
+        # Support both the bare `@njit` and the `@njit(cache=True)` forms
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+
+        def decorator(func):
+            return func
+
+        return decorator
+
+
+def kernel_source_hash() -> int:
+    """Return the first 8 bytes of the SHA-256 of `_jit.py` as a signed 64-bit integer."""
+    with open(KERNEL_SOURCE, "rb") as f:
+        digest = hashlib.sha256(f.read()).digest()
+    return int.from_bytes(digest[:8], "little", signed=True)
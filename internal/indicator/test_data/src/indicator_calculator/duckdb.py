@@ -1,25 +1,90 @@
+import os
+
 import duckdb
+import numpy as np
 import pandas as pd
 
+# pyarrow is optional: without it parquet files are written through duckdb
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+# A single persistent connection, so duckdb's buffer manager, thread pool and parquet
+# metadata cache are reused across calls instead of going through the default connection
+_CON = duckdb.connect(database=':memory:', config={'threads': str(os.cpu_count() or 1)})
 
-def read_parquet_to_df(path: str) -> pd.DataFrame:
+
+def read_parquet_to_df(path: str, limit: int | None = None) -> pd.DataFrame:
     """
     Read a parquet file into a pandas dataframe.
     Args:
         path (str): The path to the parquet file.
+        limit (int | None): Only read the first `limit` rows of the file. Default is None (all rows).
     Returns:
         pd.DataFrame: The dataframe containing the data from the parquet file.
     """
     # Use duckdb to read the parquet file
-    df = duckdb.query(f"SELECT * FROM '{path}'").to_df()
+    query = "SELECT * FROM read_parquet(?)"
+    params = [path]
+    if limit is not None:
+        # Let duckdb stop scanning once enough rows are read instead of slicing in pandas
+        query += " LIMIT ?"
+        params.append(int(limit))
+    df = _CON.execute(query, params).fetch_df()
     return df
 
-def write_df_to_parquet(df: pd.DataFrame, path: str) -> None:
+def read_parquet_columns(path: str, columns: tuple[str, ...] | None = None,
+                         limit: int | None = None) -> dict[str, np.ndarray]:
+    """
+    Read columns of a parquet file into NumPy arrays, without building a pandas dataframe.
+    Float columns with NULL values are returned with NaN in their place.
+    Args:
+        path (str): The path to the parquet file.
+        columns (tuple[str, ...] | None): The columns to read. Default is None (all columns).
+        limit (int | None): Only read the first `limit` rows of the file. Default is None (all rows).
+    Returns:
+        dict[str, np.ndarray]: The arrays keyed by column name, in file order.
+    """
+    selected = "*" if columns is None else ", ".join('"' + c.replace('"', '""') + '"' for c in columns)
+    query = f"SELECT {selected} FROM read_parquet(?)"
+    params = [path]
+    if limit is not None:
+        query += " LIMIT ?"
+        params.append(int(limit))
+
+    arrays = _CON.execute(query, params).fetchnumpy()
+    for name, values in arrays.items():
+        # duckdb returns masked arrays for columns with NULL values
+        if isinstance(values, np.ma.MaskedArray):
+            if values.dtype.kind == 'f':
+                arrays[name] = values.filled(np.nan)
+            else:
+                filled = values.data.astype(object)
+                filled[np.ma.getmaskarray(values)] = None
+                arrays[name] = filled
+    return arrays
+
+
+def write_df_to_parquet(df: pd.DataFrame, path: str, use_duckdb: bool = False) -> None:
     """
     Write a pandas dataframe to a parquet file.
     Args:
         df (pd.DataFrame): The dataframe to write.
         path (str): The path to the output parquet file.
+        use_duckdb (bool): Whether to write through duckdb instead of pyarrow. Default is False.
+            duckdb is always used when pyarrow is not installed.
     """
-    # Use duckdb to write the dataframe to a parquet file
-    duckdb.from_df(df).write_parquet(path)
\ No newline at end of file
+    if use_duckdb or pq is None:
+        # Use duckdb to write the dataframe to a parquet file
+        _CON.from_df(df).write_parquet(path, compression='zstd')
+        return
+
+    # Write the arrow table directly, skipping duckdb's conversion. NaN values are stored as NULL
+    # like duckdb does, and zstd level 1 writes faster than the snappy default at a similar size.
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    pq.write_table(table, path, compression='zstd', compression_level=1,
+                   row_group_size=max(1, min(len(df), 65536)))
+
@@ -1,31 +1,54 @@
+import warnings
+
+import numpy as np
 import pandas as pd
 
+from ._njit import kernel_source_hash
+
+# Prefer the kernels compiled ahead of time by build_indicator_aot.py, which skip the JIT
+# compilation on the first call, and fall back to the JIT-compiled ones. The compiled module
+# records the hash of the _jit.py it was built from, so a stale build is never used.
+try:
+    from .indicator_kernels import _fused_indicators, _kernel_source_hash, _macd_loop, _multi_sma
+
+    if _kernel_source_hash() != kernel_source_hash():
+        warnings.warn("indicator_kernels was compiled from an older _jit.py, using the JIT kernels instead; "
+                      "re-run build_indicator_aot.py to rebuild it")
+        raise ImportError("stale indicator_kernels")
+except ImportError:
+    from ._jit import _fused_indicators, _macd_loop, _multi_sma
+
 
-def calculate_rsi(data: pd.DataFrame, period: int = 14) -> pd.DataFrame:
+def calculate_rsi(data: pd.DataFrame, period: int = 14, inplace: bool = False) -> pd.DataFrame:
     """
     Calculate the Relative Strength Index (RSI) for the given market data.
     Args:
         data (pd.DataFrame): A dataframe containing market data with a 'close' column.
         period (int): The number of periods to use for the RSI calculation. Default is 14.
+        inplace (bool): Whether to add the columns to `data` itself instead of a copy. Default is False.
     Returns:
         pd.DataFrame: A dataframe with an additional 'rsi' column containing the RSI values.
     """
-    # Create a copy of the input dataframe to avoid modifying the original
-    result = data.copy()
+    # Create a copy of the input dataframe to avoid modifying the original, unless asked not to
+    result = data if inplace else data.copy()
 
-    # Calculate price changes
-    delta = result['close'].diff()
+    # Calculate price changes on the NumPy buffer, skipping pandas' index alignment
+    close = result['close'].to_numpy(dtype=np.float64, copy=False, na_value=np.nan)
+    delta = np.empty_like(close)
+    delta[:1] = np.nan
+    np.subtract(close[1:], close[:-1], out=delta[1:])
 
-    # Separate gains and losses
-    gain = delta.where(delta > 0, 0)
-    loss = -delta.where(delta < 0, 0)
+    # Separate gains and losses. fmax treats the NaN changes as 0, like Series.where did
+    gain = np.fmax(delta, 0.0)
+    loss = np.fmax(-delta, 0.0)
 
     # Calculate average gains and losses over the specified period
-    avg_gain = gain.rolling(window=period).mean()
-    avg_loss = loss.rolling(window=period).mean()
+    avg_gain = pd.Series(gain, index=result.index).rolling(window=period).mean().to_numpy()
+    avg_loss = pd.Series(loss, index=result.index).rolling(window=period).mean().to_numpy()
 
-    # Calculate relative strength (RS)
-    rs = avg_gain / avg_loss
+    # Calculate relative strength (RS). A zero average loss gives an infinite RS (RSI 100)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rs = avg_gain / avg_loss
 
     # Calculate RSI
     column_name = f"rsi_{period}"
@@ -34,7 +57,7 @@ def calculate_rsi(data: pd.DataFrame, period: int = 14) -> pd.DataFrame:
     return result
 
 
-def calculate_ema(data: pd.DataFrame, period: int = 14) -> pd.DataFrame:
+def calculate_ema(data: pd.DataFrame, period: int = 14, inplace: bool = False) -> pd.DataFrame:
     """
     Calculate the Exponential Moving Average (EMA) for the given market data.
 
@@ -42,11 +65,12 @@ def calculate_ema(data: pd.DataFrame, period: int = 14) -> pd.DataFrame:
         data (pd.DataFrame): A dataframe containing market data with a specified column.
         period (int): The number of periods to use for the EMA calculation. Default is 14.
         column (str): The name of the column to calculate the EMA on. Default is 'close'.
+        inplace (bool): Whether to add the columns to `data` itself instead of a copy. Default is False.
     Returns:
         pd.DataFrame: A dataframe with an additional column containing the EMA values.
     """
-    # Create a copy of the input dataframe to avoid modifying the original
-    result = data.copy()
+    # Create a copy of the input dataframe to avoid modifying the original, unless asked not to
+    result = data if inplace else data.copy()
 
     # Calculate the EMA
     # First value of EMA is the SMA (Simple Moving Average) for the specified period
@@ -58,7 +82,8 @@ def calculate_macd(data: pd.DataFrame,
                    fast_period: int = 12,
                    slow_period: int = 26,
                    signal_period: int = 9,
-                   column: str = 'close') -> pd.DataFrame:
+                   column: str = 'close',
+                   inplace: bool = False) -> pd.DataFrame:
     """
     Calculate the Moving Average Convergence Divergence (MACD) for the given market data.
 
@@ -68,73 +93,26 @@ def calculate_macd(data: pd.DataFrame,
         slow_period (int): The number of periods to use for the slow EMA calculation. Default is 26.
         signal_period (int): The number of periods to use for the signal line calculation. Default is 9.
         column (str): The name of the column to calculate the MACD on. Default is 'close'.
+        inplace (bool): Whether to add the columns to `data` itself instead of a copy. Default is False.
     Returns:
         pd.DataFrame: A dataframe with additional columns for the MACD line, signal line, and histogram.
     """
-    # Create a copy of the input dataframe to avoid modifying the original
-    result = data.copy()
-
-    # Create necessary columns filled with NaN
-    result['ema_fast'] = pd.NA
-    result['ema_slow'] = pd.NA
-    result['macd_line'] = pd.NA
-    result['signal_line'] = pd.NA
-    result['macd_histogram'] = pd.NA
-
-    # Calculate the fast EMA
-    fast_multiplier = 2 / (fast_period + 1)
-    # First fast EMA is SMA of first fast_period values
-    result.loc[fast_period - 1, 'ema_fast'] = result[column].iloc[:fast_period].mean()
-    for i in range(fast_period, len(result)):
-        current_price = result.loc[i, column]
-        previous_ema = result.loc[i - 1, 'ema_fast']
-        result.loc[i, 'ema_fast'] = (current_price * fast_multiplier) + (previous_ema * (1 - fast_multiplier))
-
-    # Calculate the slow EMA
-    slow_multiplier = 2 / (slow_period + 1)
-    # First slow EMA is SMA of first slow_period values
-    result.loc[slow_period - 1, 'ema_slow'] = result[column].iloc[:slow_period].mean()
-    for i in range(slow_period, len(result)):
-        current_price = result.loc[i, column]
-        previous_ema = result.loc[i - 1, 'ema_slow']
-        result.loc[i, 'ema_slow'] = (current_price * slow_multiplier) + (previous_ema * (1 - slow_multiplier))
-
-    # Calculate the MACD line (fast EMA - slow EMA)
-    # MACD line will start from the slow period (since we need both EMAs)
-    for i in range(slow_period - 1, len(result)):
-        result.loc[i, 'macd_line'] = result.loc[i, 'ema_fast'] - result.loc[i, 'ema_slow']
-
-    # Calculate the signal line (EMA of MACD line)
-    signal_multiplier = 2 / (signal_period + 1)
-
-    # Determine the first valid MACD index (needs both fast and slow EMAs)
-    first_valid_macd = max(fast_period, slow_period) - 1
-
-    # First signal line value is SMA of first signal_period MACD values
-    first_signal_index = first_valid_macd + signal_period - 1
-    if first_signal_index < len(result):
-        valid_macd_values = result['macd_line'].iloc[first_valid_macd:first_signal_index + 1].dropna()
-        if len(valid_macd_values) > 0:
-            result.loc[first_signal_index, 'signal_line'] = valid_macd_values.mean()
-
-            # Calculate signal line for the remaining data points
-            for i in range(first_signal_index + 1, len(result)):
-                current_macd = result.loc[i, 'macd_line']
-                previous_signal = result.loc[i - 1, 'signal_line']
-                result.loc[i, 'signal_line'] = (current_macd * signal_multiplier) + (
-                            previous_signal * (1 - signal_multiplier))
-
-    # Calculate the MACD histogram (MACD line - signal line)
-    for i in range(first_signal_index, len(result)):
-        result.loc[i, 'macd_histogram'] = result.loc[i, 'macd_line'] - result.loc[i, 'signal_line']
-
-    # Drop the intermediate columns if you don't want them in the final result
-    result = result.drop(['ema_fast', 'ema_slow'], axis=1)
+    # Create a copy of the input dataframe to avoid modifying the original, unless asked not to
+    result = data if inplace else data.copy()
+
+    # Calculate both EMAs, the MACD line, the signal line and the histogram in one pass
+    close = np.ascontiguousarray(result[column].to_numpy(dtype=np.float64, na_value=np.nan))
+    _, _, macd_line, signal_line, macd_histogram = _macd_loop(close, fast_period, slow_period, signal_period)
+
+    result['macd_line'] = macd_line
+    result['signal_line'] = signal_line
+    result['macd_histogram'] = macd_histogram
 
     return result
 
 
-def calculate_sma(data: pd.DataFrame, period: int = 20, column: str = 'close') -> pd.DataFrame:
+def calculate_sma(data: pd.DataFrame, period: int = 20, column: str = 'close',
+                  inplace: bool = False) -> pd.DataFrame:
     """
     Calculate the Simple Moving Average (SMA) for the given market data.
 
@@ -142,14 +120,94 @@ def calculate_sma(data: pd.DataFrame, period: int = 20, column: str = 'close') -
         data (pd.DataFrame): A dataframe containing market data with a specified column.
         period (int): The number of periods to use for the moving average calculation. Default is 20.
         column (str): The name of the column to calculate the moving average on. Default is 'close'.
+        inplace (bool): Whether to add the columns to `data` itself instead of a copy. Default is False.
     Returns:
         pd.DataFrame: A dataframe with an additional column containing the moving average values.
     """
-    # Create a copy of the input dataframe to avoid modifying the original
-    result = data.copy()
+    # Create a copy of the input dataframe to avoid modifying the original, unless asked not to
+    result = data if inplace else data.copy()
 
     # Calculate the simple moving average
     # The first (period-1) values will be NaN
-    result[f'sma_{period}'] = result[column].rolling(window=period).mean()
+    values = np.ascontiguousarray(result[column].to_numpy(dtype=np.float64, na_value=np.nan))
+    sma = np.empty((1, len(values)))
+    _multi_sma(values, np.array([period], dtype=np.int64), sma)
+    result[f'sma_{period}'] = sma[0]
+
+    return result
+
+
+def calculate_rsi_ema_sma(data: pd.DataFrame, periods: tuple[int, ...] = (7, 14, 21)) -> pd.DataFrame:
+    """
+    Calculate the RSI, EMA and SMA for several periods at once for the given market data.
+    Gives the same columns as calling calculate_rsi, calculate_ema and calculate_sma for each
+    period, but walks the close prices only once.
+
+    Args:
+        data (pd.DataFrame): A dataframe containing market data with a 'close' column.
+        periods (tuple[int, ...]): The periods to calculate the indicators for. Default is (7, 14, 21).
+    Returns:
+        pd.DataFrame: A dataframe with additional 'rsi_{period}', 'ema_{period}' and 'sma_{period}' columns.
+    """
+    columns = _rsi_ema_sma(data['close'].to_numpy(dtype=np.float64, na_value=np.nan), periods)
 
-    return result
\ No newline at end of file
+    # Add all the columns at once instead of growing the dataframe one column at a time
+    return pd.concat([data, pd.DataFrame(columns, index=data.index)], axis=1)
+
+
+def calculate_all(close: np.ndarray,
+                  periods: tuple[int, ...] = (7, 14, 21),
+                  fast_period: int = 12,
+                  slow_period: int = 26,
+                  signal_period: int = 9) -> dict[str, np.ndarray]:
+    """
+    Calculate every indicator column for the given close prices in one batched call.
+    Gives the same values as calculate_rsi, calculate_ema, calculate_sma and calculate_macd,
+    without building a dataframe for each of them. This includes NaN closes, such as the NULL
+    closes read_parquet_columns returns as NaN.
+
+    Args:
+        close (np.ndarray): The close prices.
+        periods (tuple[int, ...]): The periods to calculate the RSI, EMA and SMA for. Default is (7, 14, 21).
+        fast_period (int): The number of periods to use for the fast MACD EMA. Default is 12.
+        slow_period (int): The number of periods to use for the slow MACD EMA. Default is 26.
+        signal_period (int): The number of periods to use for the MACD signal line. Default is 9.
+    Returns:
+        dict[str, np.ndarray]: The 'rsi_{period}', 'ema_{period}' and 'sma_{period}' columns for each
+            period, followed by 'macd_line', 'signal_line' and 'macd_histogram'.
+    """
+    close = np.ascontiguousarray(close, dtype=np.float64)
+    columns = _rsi_ema_sma(close, periods)
+
+    _, _, macd_line, signal_line, macd_histogram = _macd_loop(close, fast_period, slow_period, signal_period)
+    columns['macd_line'] = macd_line
+    columns['signal_line'] = signal_line
+    columns['macd_histogram'] = macd_histogram
+
+    return columns
+
+
+def _rsi_ema_sma(close: np.ndarray, periods: tuple[int, ...]) -> dict[str, np.ndarray]:
+    """
+    Run the fused RSI/EMA/SMA kernel and return its outputs keyed by column name.
+    Args:
+        close (np.ndarray): The float64 close prices.
+        periods (tuple[int, ...]): The periods to calculate the indicators for.
+    Returns:
+        dict[str, np.ndarray]: The 'rsi_{period}', 'ema_{period}' and 'sma_{period}' columns for each period.
+    """
+    close = np.ascontiguousarray(close, dtype=np.float64)
+    period_array = np.asarray(periods, dtype=np.int64)
+
+    shape = (len(period_array), len(close))
+    rsi = np.empty(shape)
+    ema = np.empty(shape)
+    sma = np.empty(shape)
+    _fused_indicators(close, period_array, rsi, ema, sma)
+
+    columns = {}
+    for j, period in enumerate(periods):
+        columns[f'rsi_{period}'] = rsi[j]
+        columns[f'ema_{period}'] = ema[j]
+        columns[f'sma_{period}'] = sma[j]
+    return columns
@@ -1,4 +1,6 @@
-from indicator_calculator import calculate_rsi, calculate_ema, read_parquet_to_df, write_df_to_parquet, calculate_macd, calculate_sma
+import pandas as pd
+
+from indicator_calculator import read_parquet_columns, write_df_to_parquet, calculate_all
 
 
 def main():
@@ -8,18 +10,14 @@ def main():
     # Path to the output parquet file
     output_path = '../test_data.parquet'
 
-    # Read the input data
-    data = read_parquet_to_df(input_path)
+    # Read only the first 500 rows. The indicators only look back, so they don't need the rest
+    columns = read_parquet_columns(input_path, limit=500)
 
-    # Calculate RSI 7, 14, 21
-    for period in [7, 14, 21]:
-        data = calculate_rsi(data, period=period)
-        data = calculate_ema(data, period=period)
-        data = calculate_sma(data, period=period)
+    # Calculate RSI, EMA and SMA 7, 14, 21 and the MACD in one batched call
+    indicators = calculate_all(columns['close'], periods=(7, 14, 21))
 
-    data = calculate_macd(data)
-    # Only first 500 rows
-    data = data.head(500)
+    # Build the output dataframe once
+    data = pd.DataFrame({**columns, **indicators}, copy=False)
 
     # Write the result to a new parquet file
     write_df_to_parquet(data, output_path)
@@ -6,35 +6,61 @@ their title and description from YAML frontmatter.
 
 import os
 import re
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+# Frontmatter is at the top of the file, so only the start of each file is read
+FRONTMATTER_READ_SIZE = 4096
+FRONTMATTER_RE = re.compile(rb"^---\s*\n(.*?)\n---", re.DOTALL)
+TITLE_RE = re.compile(r"^title:\s*(.+)$", re.MULTILINE)
+DESCRIPTION_RE = re.compile(r"^description:\s*(.+)$", re.MULTILINE)
 
-def extract_frontmatter(file_path: Path) -> dict:
-    """Extract title and description from YAML frontmatter."""
-    with open(file_path, "r", encoding="utf-8") as f:
-        content = f.read()
-
-    # Match YAML frontmatter between --- delimiters
-    match = re.match(r"^---\s*\n(.*?)\n---", content, re.DOTALL)
-    if not match:
-        return {}
 
-    frontmatter = match.group(1)
+def parse_frontmatter(frontmatter: str) -> dict:
+    """Parse title and description from the YAML frontmatter text."""
     result = {}
 
     # Extract title
-    title_match = re.search(r"^title:\s*(.+)$", frontmatter, re.MULTILINE)
+    title_match = TITLE_RE.search(frontmatter)
     if title_match:
         result["title"] = title_match.group(1).strip().strip('"\'')
 
     # Extract description
-    desc_match = re.search(r"^description:\s*(.+)$", frontmatter, re.MULTILINE)
+    desc_match = DESCRIPTION_RE.search(frontmatter)
     if desc_match:
         result["description"] = desc_match.group(1).strip().strip('"\'')
 
     return result
 
 
+def extract_frontmatter(file_path: Path) -> dict:
+    """Extract title and description from YAML frontmatter."""
+    with open(file_path, "rb") as f:
+        content = f.read(FRONTMATTER_READ_SIZE)
+
+        # Match YAML frontmatter between --- delimiters
+        match = FRONTMATTER_RE.match(content)
+        if not match and content.startswith(b"---") and len(content) == FRONTMATTER_READ_SIZE:
+            # The frontmatter is longer than the first chunk
+            content += f.read()
+            match = FRONTMATTER_RE.match(content)
+
+    if not match:
+        return {}
+
+    return parse_frontmatter(match.group(1).decode("utf-8"))
+
+
+def iter_markdown_files(directory: str):
+    """Recursively yield the markdown files under directory as os.DirEntry objects."""
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if entry.is_dir():
+                yield from iter_markdown_files(entry.path)
+            elif entry.is_file() and entry.name.endswith(".md"):
+                yield entry
+
+
 def get_section_name(folder: str) -> str:
     """Convert folder name to a human-readable section name."""
     if folder == "":
@@ -47,15 +73,22 @@ def generate_index(docs_dir: Path) -> str:
     # Collect all markdown files grouped by directory
     docs_by_folder: dict[str, list[dict]] = {}
 
-    for md_file in sorted(docs_dir.rglob("*.md")):
+    md_files = [
+        Path(entry.path)
+        for entry in sorted(iter_markdown_files(str(docs_dir)), key=lambda e: e.path)
         # Skip index.md itself
-        if md_file.name == "index.md":
-            continue
+        if entry.name != "index.md"
+    ]
+
+    # The reads are independent and release the GIL, so run them in a thread pool
+    max_workers = min(32, (os.cpu_count() or 1) * 4)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        frontmatters = list(executor.map(extract_frontmatter, md_files))
 
+    for md_file, frontmatter in zip(md_files, frontmatters):
         relative_path = md_file.relative_to(docs_dir)
         folder = str(relative_path.parent) if relative_path.parent != Path(".") else ""
 
-        frontmatter = extract_frontmatter(md_file)
         title = frontmatter.get("title", md_file.stem.replace("-", " ").title())
         description = frontmatter.get("description", "")
 